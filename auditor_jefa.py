@@ -1,10 +1,61 @@
 import uuid
 import datetime
-import json
 import os
 import argparse
 import time
+from functools import lru_cache
 from modules.auto_fixer import AutoFixer
+from modules.json_utils import dumps_pretty as _dumps
+
+__all__ = ["process_wcag_audit"]
+
+# Buffer de escritura de 1 MiB: el reporte se escribe en miles de trozos pequeños
+WRITE_BUFFER_SIZE = 1 << 20
+
+def write_report_stream(path: str, report: dict) -> None:
+    """
+    Escribe el reporte clave por clave y las listas elemento por elemento,
+    así nunca se arma el JSON completo en un único buffer en memoria.
+    El resultado es idéntico al de un dump indentado a 2 espacios.
+    """
+    with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(b"{")
+        for i, (key, value) in enumerate(report.items()):
+            f.write(b",\n  " if i else b"\n  ")
+            f.write(_dumps(key) + b": ")
+            if isinstance(value, list) and value:
+                f.write(b"[")
+                for j, item in enumerate(value):
+                    f.write(b",\n    " if j else b"\n    ")
+                    f.write(_dumps(item).replace(b"\n", b"\n    "))
+                f.write(b"\n  ]")
+            else:
+                f.write(_dumps(value).replace(b"\n", b"\n  "))
+        f.write(b"\n}" if report else b"}")
+
+# Tabla para aplanar saltos de línea en los logs (str.translate, nivel C)
+_NL_TR = str.maketrans({'\n': ' ', '\r': ' '})
+
+# Pocas entradas: cada una guarda el HTML de entrada y el corregido, y hay
+# una caché por worker de uvicorn
+@lru_cache(maxsize=8)
+def _run_fixer_frozen(html_content: str) -> tuple:
+    """Resultado del AutoFixer en tuplas inmutables, seguro de compartir."""
+    fixed_html, fixes_list, manual_alerts = AutoFixer(html_content).run()
+    return (
+        fixed_html,
+        tuple(tuple(fix.items()) for fix in fixes_list),
+        tuple(tuple(alert.items()) for alert in manual_alerts),
+    )
+
+def _run_fixer(html_content: str) -> tuple:
+    """
+    El AutoFixer es determinista: el mismo HTML (reintentos, previews) reusa
+    el resultado anterior. Las listas y dicts se crean nuevos en cada
+    llamada, así quien modifique el reporte no toca lo que está en caché.
+    """
+    fixed_html, fixes, alerts = _run_fixer_frozen(html_content)
+    return fixed_html, [dict(fix) for fix in fixes], [dict(alert) for alert in alerts]
 
 def simulate_audit_scan(html_content, fixes_count):
     """
@@ -31,8 +82,7 @@ def process_wcag_audit(html_content: str, filename: str = "archivo.html") -> dic
     start_time = time.perf_counter()
 
     # 1. Ejecutar AutoFixer
-    fixer = AutoFixer(html_content)
-    fixed_html, fixes_list, manual_alerts = fixer.run()
+    fixed_html, fixes_list, manual_alerts = _run_fixer(html_content)
     
     # 2. Simular Auditoría Técnica
     metrics = simulate_audit_scan(html_content, len(fixes_list))
@@ -46,8 +96,9 @@ def process_wcag_audit(html_content: str, filename: str = "archivo.html") -> dic
     # 2. Acción: Un humano tarda ~45 seg en corregir, guardar y verificar un error puntual.
     # 3. Setup: 2 minutos fijos de abrir editor y preparar entorno.
     
-    total_lines = len(html_content.split('\n'))
+    total_lines = html_content.count('\n') + 1
     total_errors = len(fixes_list)
+    pending_manual = len(manual_alerts)
     
     human_seconds = (total_lines * 1.0) + (total_errors * 45.0) + (2 * 60)
     human_minutes = human_seconds / 60
@@ -64,23 +115,19 @@ def process_wcag_audit(html_content: str, filename: str = "archivo.html") -> dic
     ai_time_text = f"{duration_seconds:.3f}s" if duration_seconds > 0.001 else "< 0.001s"
 
     # --- 3. GENERACIÓN DE REPORTES ---
-    formatted_logs = []
-    for fix in fixes_list:
-        clean_before = fix['before'].replace('\n', ' ').strip()
-        clean_after = fix['after'].replace('\n', ' ').strip()
-        log_entry = (
-            f"linea {fix['line']}: {fix['rule']} | "
-            f"BEFORE: {clean_before} | "
-            f"AFTER: {clean_after}"
-        )
-        formatted_logs.append(log_entry)
+    formatted_logs = [
+        f"linea {fix['line']}: {fix['rule']} | "
+        f"BEFORE: {fix['before'].translate(_NL_TR).strip()} | "
+        f"AFTER: {fix['after'].translate(_NL_TR).strip()}"
+        for fix in fixes_list
+    ]
 
     report_json = {
         "resumen_ejecutivo": {
             "estado": "PARCIALMENTE_CORREGIDO" if manual_alerts else "CORREGIDO",
-            "total_errores_detectados": len(fixes_list) + len(manual_alerts),
-            "corregidos_por_bot": len(fixes_list),
-            "pendientes_de_humano": len(manual_alerts),
+            "total_errores_detectados": total_errors + pending_manual,
+            "corregidos_por_bot": total_errors,
+            "pendientes_de_humano": pending_manual,
             "tiempo_ia_segundos": ai_time_text,
             "tiempo_humano_ahorrado": saved_text
         },
@@ -104,8 +151,8 @@ def process_wcag_audit(html_content: str, filename: str = "archivo.html") -> dic
         f"Estado:                     ✅ Finalizado con éxito\n"
         f"🪓 Violaciones Críticas (Axe): {metrics['axe']}\n"
         f"🌐 Errores de Estándar (W3C):  {metrics['w3c']}\n"
-        f"🛠️  Correcciones Aplicadas:     {len(fixes_list)}\n"
-        f"🧠 Revisión Manual Requerida:  {len(manual_alerts)}\n"
+        f"🛠️  Correcciones Aplicadas:     {total_errors}\n"
+        f"🧠 Revisión Manual Requerida:  {pending_manual}\n"
         f"-----------------------------------\n"
         f"⏳ Tiempo Ahorrado:           {saved_text}\n"
     )
@@ -143,10 +190,9 @@ if __name__ == "__main__":
         # Guardado de archivos
         filenames = result["_suggested_filenames"]
         
-        with open(filenames["report"], "w", encoding="utf-8") as f:
-            json.dump(result["report_json_content"], f, indent=2, ensure_ascii=False)
+        write_report_stream(filenames["report"], result["report_json_content"])
         
-        with open(filenames["fixed"], "w", encoding="utf-8") as f:
+        with open(filenames["fixed"], "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
             f.write(result["fixed_html_content"])
             
     except Exception as e:
@@ -1,4 +1,9 @@
+import asyncio
+import os
+import threading
+import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response, HTMLResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -22,6 +27,9 @@ class AuditRequest(BaseModel):
     # Power Automate enviará el HTML como texto dentro de este campo JSON
     html_content: str
     filename: str = "archivo_desde_copilot.html" # Opcional, nombre por defecto
+    # Si es False, el HTML corregido no viaja escapado dentro del JSON
+    # (el cliente lo pide aparte a /audit/fixed_html)
+    include_fixed_html: bool = True
 
 # --- ENDPOINTS ---
 @app.get("/")
@@ -32,6 +40,14 @@ def read_root():
         "description": "API optimizada para Microsoft Copilot Studio"
     }
 
+@app.get("/health")
+async def health():
+    """
+    Estado por worker de uvicorn (cada worker es un proceso con su propio
+    pool de hilos de asyncio.to_thread).
+    """
+    return {"status": "ok", "pid": os.getpid(), "threads": threading.active_count()}
+
 @app.post("/audit")
 async def audit_html(request: AuditRequest):
     """
@@ -39,18 +55,50 @@ async def audit_html(request: AuditRequest):
     Recibe el HTML crudo, lo limpia, lo analiza y retorna el JSON estructurado.
     """
     try:
-        # Llamamos a tu función 'Jefa' directamente.
-        # Ya no necesitamos crear archivos temporales ni hilos complejos.
-        resultado = process_wcag_audit(request.html_content, request.filename)
+        # Llamamos a tu función 'Jefa' en un hilo aparte: el AutoFixer es
+        # CPU puro y bloquearía el event loop para las demás peticiones.
+        resultado = await asyncio.to_thread(
+            process_wcag_audit, request.html_content, request.filename
+        )
         
-        return resultado
+        if not request.include_fixed_html:
+            resultado.pop("fixed_html_content", None)
+
+        # Devolvemos la respuesta ya construida: orjson serializa el reporte
+        # (incluido el HTML corregido) sin pasar por jsonable_encoder.
+        return Response(
+            content=orjson.dumps(resultado, option=orjson.OPT_NON_STR_KEYS),
+            media_type="application/json",
+        )
 
     except Exception as e:
         print(f"❌ Error procesando solicitud: {str(e)}")
         # Retornamos un 500 limpio si algo explota
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/audit/fixed_html", response_class=HTMLResponse)
+async def audit_fixed_html(request: AuditRequest):
+    """
+    Igual que /audit pero retorna solo el HTML corregido como text/html,
+    sin el costo de escaparlo como string JSON.
+    """
+    try:
+        resultado = await asyncio.to_thread(
+            process_wcag_audit, request.html_content, request.filename
+        )
+        return HTMLResponse(content=resultado["fixed_html_content"])
+
+    except Exception as e:
+        print(f"❌ Error procesando solicitud: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     # Esto permite correrlo localmente para pruebas con: python main.py
-    uvicorn.run(app, host="0.0.0.0", port=8099)
\ No newline at end of file
+    # Un worker por núcleo reparte las auditorías (regex = CPU).
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8099,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+    )
\ No newline at end of file
@@ -1,37 +1,71 @@
 import subprocess
-import json
+import gzip
 import os
+import shutil
+import orjson
 import requests
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Union
+
+# Sesión HTTP compartida: reutiliza la conexión TLS con validator.w3.org
+# entre la fase 1 y la fase 3 (y entre auditorías) en vez de renegociarla.
+_HTTP_SESSION = requests.Session()
+
+# Endpoint del Nu HTML Checker. Con un vnu.jar local en modo servidor
+# (java -cp vnu.jar nu.validator.servlet.Main 8888) se evita el viaje a
+# Internet y el rate limit público: W3C_VALIDATOR_URL=http://localhost:8888/?out=json
+W3C_VALIDATOR_URL = os.getenv("W3C_VALIDATOR_URL", "https://validator.w3.org/nu/?out=json")
 
 # --- Helper para limpiar salidas de Node.js ---
-def safe_parse_json(raw_stdout: str) -> Dict[str, Any]:
+def safe_parse_json(raw_stdout: Union[str, bytes]) -> Dict[str, Any]:
     """
     Intenta extraer y parsear un objeto JSON válido de una cadena de texto sucia.
-    Busca el primer '{' y el último '}'.
+    Busca el primer '{' y el último '}'. Acepta str o los bytes crudos del proceso.
     """
     if not raw_stdout:
         return {}
+
+    if isinstance(raw_stdout, bytes):
+        json_starts, brace_open, brace_close = (b"{", b"["), b"{", b"}"
+    else:
+        json_starts, brace_open, brace_close = ("{", "["), "{", "}"
         
-    # 1. Intento directo (el ideal)
-    try:
-        return json.loads(raw_stdout)
-    except json.JSONDecodeError:
-        pass # Falló, probamos limpieza manual
+    # 1. Intento directo (el ideal). Si la salida no empieza como JSON
+    #    (logs de npx, warnings) ni lo intentamos: fallaría igual.
+    if raw_stdout.lstrip()[:1] in json_starts:
+        try:
+            return orjson.loads(raw_stdout)
+        except ValueError:
+            pass # Falló, probamos limpieza manual
 
     # 2. Búsqueda de patrón JSON (ignora logs de "Downloading...", warnings, etc.)
     try:
-        start_idx = raw_stdout.find('{')
-        end_idx = raw_stdout.rfind('}') + 1
+        start_idx = raw_stdout.find(brace_open)
+        end_idx = raw_stdout.rfind(brace_close) + 1
         
         if start_idx != -1 and end_idx > start_idx:
             clean_json_str = raw_stdout[start_idx:end_idx]
-            return json.loads(clean_json_str)
+            return orjson.loads(clean_json_str)
     except Exception:
         pass
         
     return None
 
+# --- Resolución de CLIs de Node ---
+_NODE_BIN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "node_modules", ".bin")
+
+@lru_cache(maxsize=None)
+def _node_cli(name: str) -> tuple:
+    """
+    Retorna el comando base para un CLI de Node. Usa el binario instalado por
+    `npm install` (node_modules/.bin) si existe y se ahorra la resolución de
+    paquetes de `npx` en cada auditoría; si no, cae a `npx <name>`.
+    """
+    local = shutil.which(name, path=_NODE_BIN_DIR)
+    if local:
+        return (local,)
+    return ("npx", name)
+
 # --- Funciones de Auditoría ---
 
 def run_lighthouse(target_url: str) -> Dict[str, Any]:
@@ -45,7 +79,7 @@ def run_lighthouse(target_url: str) -> Dict[str, Any]:
     # --quiet: Menos logs
     # --no-enable-error-reporting: Evita prompts interactivos
     cmd = [
-        "npx", "lighthouse", target_url,
+        *_node_cli("lighthouse"), target_url,
         "--output=json",
         "--only-categories=accessibility",
         "--chrome-flags='--headless --no-sandbox --disable-dev-shm-usage'",
@@ -54,14 +88,15 @@ def run_lighthouse(target_url: str) -> Dict[str, Any]:
     ]
     
     try:
-        # errors='replace' evita crasheos por emojis o caracteres raros en la consola
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
+        # Bytes crudos: el reporte (varios MB) se parsea sin decodificarlo antes a str
+        result = subprocess.run(cmd, capture_output=True)
         
         data = safe_parse_json(result.stdout)
         
         if not data:
             # Si falló el parseo, devolvemos el error crudo para debug
-            return {"error": "Lighthouse output parsing failed", "raw_snippet": result.stdout[:200]}
+            # (errors='replace' evita crasheos por emojis o caracteres raros)
+            return {"error": "Lighthouse output parsing failed", "raw_snippet": result.stdout[:200].decode('utf-8', errors='replace')}
         
         # Lighthouse devuelve "categories" -> "accessibility" -> "score" (0 a 1)
         score = data.get("categories", {}).get("accessibility", {}).get("score", 0)
@@ -77,10 +112,10 @@ def run_pa11y(target_url: str) -> Dict[str, Any]:
     """
     print(f"   [Node] Ejecutando Pa11y para {target_url}...")
     
-    cmd = ["npx", "pa11y", target_url, "--reporter", "json"]
+    cmd = [*_node_cli("pa11y"), target_url, "--reporter", "json"]
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
+        result = subprocess.run(cmd, capture_output=True)
         
         data = safe_parse_json(result.stdout)
         
@@ -92,7 +127,7 @@ def run_pa11y(target_url: str) -> Dict[str, Any]:
                  # A veces devuelve un objeto error
                  return {"issues_count": 0, "issues": [], "raw_data": data}
         
-        return {"error": "Pa11y parsing failed", "raw_snippet": result.stdout[:200]}
+        return {"error": "Pa11y parsing failed", "raw_snippet": result.stdout[:200].decode('utf-8', errors='replace')}
             
     except Exception as e:
         return {"error": str(e)}
@@ -110,10 +145,10 @@ def run_w3c_validator(file_path: str) -> Dict[str, Any]:
         with open(file_path, 'rb') as f:
             content = f.read()
         
-        headers = {'Content-Type': 'text/html; charset=utf-8'}
-        url = 'https://validator.w3.org/nu/?out=json'
+        # El checker acepta el cuerpo comprimido: el HTML viaja ~5x más liviano
+        headers = {'Content-Type': 'text/html; charset=utf-8', 'Content-Encoding': 'gzip'}
         
-        response = requests.post(url, headers=headers, data=content, timeout=30)
+        response = _HTTP_SESSION.post(W3C_VALIDATOR_URL, headers=headers, data=gzip.compress(content, compresslevel=6), timeout=30)
         
         if response.status_code == 200:
             data = response.json()
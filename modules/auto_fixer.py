@@ -1,5 +1,390 @@
 import re
-from typing import Tuple, List, Dict, Any, Set
+from collections import Counter
+from typing import Tuple, List, Dict, Any, Set, Pattern, Union, Callable, Optional
+
+# Hyperscan es opcional (solo Linux x86-64). Si está instalado se usa como
+# prefiltro multi-patrón para las reglas fusionadas; si no, todo va por `re`.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# --- REGLAS PRECOMPILADAS ---
+# Todas las expresiones se compilan una sola vez al importar el módulo, así cada
+# llamada a run() solo paga el matching (sin búsquedas en la caché interna de `re`).
+_FLAGS = re.IGNORECASE | re.DOTALL
+
+# Ventana (pos, endpos) donde una regla puede coincidir, o None si no puede
+_Bound = Callable[[str], Optional[Tuple[int, int]]]
+
+def _literal_hint(pattern: str) -> str:
+    """
+    Tramo literal más largo que toda coincidencia debe contener (en minúsculas).
+    Solo mira el nivel superior: grupos, clases, escapes como \s y cualquier
+    átomo con cuantificador cortan el tramo. Devuelve '' si no hay ninguno seguro.
+    """
+    best = run = ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        literal = None
+        if ch == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                literal = escaped
+            i += 2
+        elif ch == '[':
+            i += 1
+            if pattern[i:i + 1] == '^':
+                i += 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            i += 1
+        elif ch in '*+?{':
+            # El átomo anterior pasa a ser opcional/repetido: fuera del tramo
+            run = run[:-1]
+            i = pattern.index('}', i) + 1 if ch == '{' else i + 1
+        elif ch == '|' and depth == 0:
+            return ''
+        elif ch in '()':
+            depth += 1 if ch == '(' else -1
+            i += 1
+        elif ch in '.^$|':
+            i += 1
+        else:
+            literal = ch
+            i += 1
+
+        if literal is not None and depth == 0:
+            run += literal
+        else:
+            best = max(best, run, key=len)
+            run = ''
+    return max(best, run, key=len).lower()
+
+def _compile_rules(rules) -> List[Tuple[Pattern, Any, str, Optional[_Bound], str]]:
+    """Convierte una tabla (patrón, reemplazo, nombre[, ventana]) en reglas compiladas."""
+    compiled = []
+    for pattern, replacement, rule_name, *bound in rules:
+        compiled.append((re.compile(pattern, _FLAGS), replacement, rule_name,
+                         bound[0] if bound else None, _literal_hint(pattern)))
+    return compiled
+
+# --- VENTANAS DE BÚSQUEDA ---
+# Un `.*?` sin cierre más adelante recorre hasta el final del documento por
+# cada apertura: O(aperturas·N), segundos con unos cientos de <p> o <b>
+# sueltos. Ninguna coincidencia empieza antes de la primera apertura ni
+# termina después del último cierre, así que buscar solo en ese tramo da el
+# mismo resultado y las aperturas sin cierre ya no se recorren.
+def _until_last(opener: str, terminator: str) -> _Bound:
+    open_re = re.compile(opener, _FLAGS)
+    term_re = re.compile(terminator, _FLAGS)
+
+    def bound(text: str) -> Optional[Tuple[int, int]]:
+        first = open_re.search(text)
+        if first is None:
+            return None
+        last = None
+        for last in term_re.finditer(text, first.end()):
+            pass
+        return None if last is None else (first.start(), last.end())
+    return bound
+
+def _after_last(opener: str, blocker: str) -> _Bound:
+    """`apertura(?!.*bloqueo)` solo se cumple tras el último bloqueo: la ventana
+    empieza ahí y la regla puede prescindir del lookahead (O(N) por apertura)."""
+    open_re = re.compile(opener, _FLAGS)
+    block_re = re.compile(blocker, _FLAGS)
+
+    def bound(text: str) -> Optional[Tuple[int, int]]:
+        if open_re.search(text) is None:
+            return None
+        last = None
+        for last in block_re.finditer(text):
+            pass
+        first = open_re.search(text, 0 if last is None else last.start() + 1)
+        return None if first is None else (first.start(), len(text))
+    return bound
+
+# Caracteres donde `re` (Unicode) y Hyperscan (UTF8 + UCP) no coinciden:
+# \s en \x1c-\x1f, la i turca con IGNORECASE y dígitos fuera del BMP.
+# Si el texto los contiene no se prefiltra y todas las reglas corren.
+_HS_UNSAFE = re.compile('[\x1c-\x1f\u0130\u0131\U00010000-\U0010ffff]')
+
+def _hs_flags() -> int:
+    return (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_DOTALL | hyperscan.HS_FLAG_SINGLEMATCH
+            | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP)
+
+def _build_scanner(patterns: List[str]) -> Optional[Callable[[str], Optional[Set[int]]]]:
+    """
+    Compila los patrones en una base Hyperscan (DFA, una sola pasada) y
+    devuelve una función que retorna los índices de los patrones que
+    aparecen en el texto, o None si el texto no se puede prefiltrar.
+    Retorna None si Hyperscan no está disponible o no acepta algún patrón.
+    """
+    if hyperscan is None or not patterns:
+        return None
+    # Fuera de Latin-1 no está verificado que Hyperscan pliegue mayúsculas como `re`
+    if any(ord(c) > 0xff for p in patterns for c in p):
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode("utf-8") for p in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[_hs_flags()] * len(patterns),
+        )
+    except Exception:
+        return None
+
+    def scan(text: str) -> Optional[Set[int]]:
+        if _HS_UNSAFE.search(text):
+            return None
+        try:
+            data = text.encode("utf-8")
+        except UnicodeEncodeError:
+            return None
+        hits = set()
+        db.scan(data, match_event_handler=lambda rule_id, *args: hits.add(rule_id))
+        return hits
+
+    return scan
+
+def _fuse_rules(rules) -> Tuple[Pattern, Dict[str, Tuple[str, str, int]], Optional[Callable[[str], Optional[Set[int]]]]]:
+    """
+    Une reglas independientes en una sola alternancia con grupos nombrados,
+    así el documento se recorre una vez en lugar de una vez por regla.
+    Solo sirve para reemplazos literales (sin \\1) cuyos resultados no
+    vuelvan a coincidir con otra regla del mismo grupo.
+    """
+    parts = []
+    table = {}
+    for i, (pattern, replacement, rule_name) in enumerate(rules):
+        group = f"r{i}"
+        parts.append(f"(?P<{group}>{pattern})")
+        table[group] = (replacement, rule_name, i)
+    alternation = "|".join(parts)
+    # Con IGNORECASE `re` no saca un prefijo de la alternancia y prueba cada
+    # rama en cada posición; la lookahead con las letras iniciales le deja
+    # saltar directo a los candidatos.
+    # Primer carácter literal de cada rama (admite un signo escapado: \. \?)
+    firsts = {(pattern[1] if pattern[0] == "\\" else pattern[0]).lower() for pattern, _, _ in rules}
+    if all(c.isascii() and (c.isalnum() or c in "<\"'=.?") for c in firsts):
+        alternation = f"(?=[{''.join(re.escape(c) for c in sorted(firsts))}])(?:{alternation})"
+    prefilter = _build_scanner([pattern for pattern, _, _ in rules])
+    return re.compile(alternation, _FLAGS), table, prefilter
+
+# Restos de lower() para letras que re.IGNORECASE sí iguala a i/s
+_LOWER_UNSAFE = ("\u0307", "\u0131", "\u017f")
+
+# Head
+_RE_HTML_LANG_CONFLICT = re.compile(r'<html[^>]*lang=["\']es["\'][^>]*lang=["\']en["\']', re.I)
+_RE_HTML_TAG = re.compile(r'<html[^>]*>', _FLAGS)
+_RE_HEAD_OPEN = re.compile(r'(<head[^>]*>)', _FLAGS)
+_RE_VIEWPORT_META = re.compile(r'<meta\s+name=["\']viewport["\']', re.I)
+
+_HEAD_CHARSET_RULES = _compile_rules([
+    (r'<meta charset="UTF-8">', '', "Head: Limpieza charset duplicado"),
+    (r'<meta\s+charset=["\']?utf-?88?["\']?\s*/?>', '<meta charset="UTF-8">', "Head: Charset a UTF-8"),
+    (r'<meta\s+http-equiv=["\']Content-Type["\']\s+content=["\']text/html;\s*charset=[^"\']+["\']\s*/?>', '<meta charset="UTF-8">', "Head: Modernizar meta http-equiv"),
+])
+
+_HEAD_TITLE_RULES = _compile_rules([
+    (r'<title>\s*<title>', '<title>', "Head: Doble apertura title"),
+    (r'<title>\s*</title>', '<title>Documento Accesible</title>', "Head: Title vacío rellenado"),
+    (r'<title>([^<]+)<title>', r'<title>\1</title>', "Head: Cierre de <title> faltante"),
+    (r'<title>(.*?)(?:<!--.*?-->)?</title>', r'<title>\1</title>', "Head: Limpieza comentarios en title", _until_last(r'<title>', r'</title>')),
+])
+
+_HEAD_VIEWPORT_RULES = _compile_rules([
+    (r'(content=["\'][^"\']*width=device-width)\s+(initial-scale)', r'\1, \2', "Head: Sintaxis Viewport (coma faltante)"),
+    (r'content=["\']width=device-width\s+initial-scale=1(\.0)?["\']', 'content="width=device-width, initial-scale=1.0"', "Head: Sintaxis Viewport standard"),
+    (r'(viewport[^>]*content=["\'][^"\']*)\b(?:user-scalable=no|maximum-scale=1\.0|maximum-scale=1)\b', r'\1user-scalable=yes', "Head: Desbloquear zoom usuario"),
+])
+
+# Estructura y semántica
+_RE_DIV_MAIN = re.compile(r'<div\s+([^>]*\b(role=["\']main["\']|id=["\'](?:contenido|main)["\'])[^>]*)>', _FLAGS)
+_RE_ROLE_MAIN = re.compile(r'role=["\']main["\']')
+_RE_ID_ATTR = re.compile(r'id=["\']([^"\']+)["\']')
+_RE_H1 = re.compile(r'<h1', re.IGNORECASE)
+
+_STRUCTURE_RULES = _compile_rules([
+    (r'<' + r'/div>(\s*(?:<!--[\s\S]*?-->\s*)*<footer)', r'\1', "Estructura: Eliminar div cierre huérfano antes de footer"),
+    (r'id="titulo-estructuraa"', 'id="titulo-estructura"', "HTML: Typo ID estructura"),
+    # Cierre de párrafos (Versión Segura)
+    (r'(<p[^>]*>)(.*?)(?=\s*<div)', r'\1\2</p>', "HTML Sintaxis: <p> mal cerrado antes de div", _until_last(r'<p', r'<div')),
+    (r'(<p[^>]*>.*?)(?=<p)', r'\1</p>', "HTML Sintaxis: <p> anidado prohibido"),
+    (r'</p>Esta página', '<p>Esta página', "HTML: p invertido"),
+    (r'<span>([^<]+)(?!\s*</span>)', r'<span>\1</span>', "HTML: span abierto"),
+    # Listas
+    (r'(<ul>\s*)<ul>', r'\1<li><ul>', "Estructura: ul dentro de ul sin li"),
+    (r'</ul>\s*</ul>', '</ul></li></ul>', "Estructura: cierre ul anidado"),
+    (r'<li>(.*?)(?=\n\s*<li>|\n\s*</ul>)', r'<li>\1</li>', "HTML: li cierre automático", _until_last(r'<li>', r'\n\s*(?:<li>|</ul>)')),
+])
+
+_SEMANTIC_RULES = _compile_rules([
+    (r'<b>(.*?)</b>', r'<strong>\1</strong>', "Semántica: b a strong", _until_last(r'<b>', r'</b>')),
+    (r'<i>(.*?)</i>', r'<em>\1</em>', "Semántica: i a em", _until_last(r'<i>', r'</i>')),
+    (r'<center>(.*?)</center>', r'<div style="text-align:center">\1</div>', "W3C: Deprecado center", _until_last(r'<center>', r'</center>')),
+    (r'<font[^>]*>(.*?)</font>', r'<span>\1</span>', "W3C: Deprecado font", _until_last(r'<font', r'</font>')),
+    (r'<strike>(.*?)</strike>', r'<del>\1</del>', "Semántica: strike a del", _until_last(r'<strike>', r'</strike>')),
+    (r'<u>(.*?)</u>', r'<span style="text-decoration: underline;">\1</span>', "A11y: u confuso", _until_last(r'<u>', r'</u>')),
+    (r'<br\s+/>', '<br>', "HTML: XHTML br a HTML5"),
+
+    (r'(<table[^>]*)border=["\']\d+["\']', r'\1', "Clean: Tabla border"),
+    (r'(<[^>]+)align=["\'][^"\']*["\']', r'\1', "Clean: Atributo align"),
+    (r'(<[^>]+)bgcolor=["\'][^"\']*["\']', r'\1', "Clean: Atributo bgcolor"),
+    (r'<td\s+headers=["\'][^"\']*["\']', '<td', "Clean: Headers complejos en TD"),
+    (r'<table[^>]*\bsummary=["\'][^"\']*["\']', '<table', "W3C: Summary obsoleto"),
+])
+
+_GHOST_RULES = _compile_rules([
+    (r'^\s*</p>', '', "HTML: Limpieza cierre huérfano inicio"),
+    (r'(<div[^>]*>)\s*</p>', r'\1', "HTML: Limpieza cierre huérfano tras div"),
+    (r'(<form[^>]*>)\s*</p>', r'\1', "HTML: Limpieza cierre huérfano tras form"),
+    (r'</p>\s*<p>', '<p>', "HTML: Fusión de párrafos rotos"),
+])
+
+# CSS: typos literales que no se solapan entre sí, en una sola pasada
+_CSS_LITERAL_RULES = _fuse_rules([
+    (r'outline:\s*none;?', 'outline: 3px solid #ff9900;\n      outline-offset: 2px;', "CSS A11y: Foco visible restaurado"),
+    (r'display:\s*nonee', 'display: none', "CSS: Typo display"),
+    (r'width:\s*1000%;', 'width: 100%;', "CSS: 1000% a 100%"),
+    (r'background-color:\s*var\(--color-fond\)', 'background-color: var(--color-fondo)', "CSS: Typo variable fondo"),
+    (r'"Segoe UI"\s+sans-serif', '"Segoe UI", sans-serif', "CSS: Coma faltante font-family"),
+    (r'color:\s*#00000;', 'color: #000000;', "CSS: Hex incompleto"),
+])
+
+# Dependen del orden (backrefs y el style display:none que el typo habilita)
+_CSS_RULES = _compile_rules([
+    (r'(--color-fondo: #[0-9a-fA-F]{6})(\s+--color)', r'\1;\2', "CSS: Punto y coma faltante"),
+    (r'style=["\'][^"\']*display:\s*none[^"\']*["\']', 'hidden', "HTML: Style display none a atributo hidden"),
+])
+
+# ARIA
+_REDUNDANT_ROLE_RULES = _compile_rules([
+    (pat, rep, "ARIA: Roles redundantes") for pat, rep in [
+        (r'role="banner"\s+role="header"', 'role="banner"'),
+        (r'role="navigation main"', 'role="navigation"'),
+        (r'<nav[^>]*role=["\']navigation["\']', '<nav'),
+        (r'<header[^>]*role=["\']banner["\']', '<header'),
+        (r'<footer[^>]*role=["\']contentinfo["\']', '<footer'),
+        (r'<main[^>]*role=["\']main["\']', '<main'),
+        (r'<form[^>]*role=["\']form["\']', '<form'),
+    ]
+])
+
+# Typos de valores ARIA: literales independientes, se aplican en una sola pasada
+_ARIA_VALUE_RULES = _fuse_rules([
+    (r'aria-role=["\']link["\']', 'role="link"', "ARIA: aria-role no existe"),
+    (r'role=["\']menuu["\']', 'role="menu"', "ARIA: Typo menuu"),
+    (r'role=["\']menubar["\']', 'role="menu"', "ARIA: Simplificar menubar"),
+    (r'role=["\']menuitemcheckbox["\']', 'role="menuitem"', "ARIA: Simplificar checkbox"),
+
+    (r'aria-haspopup=["\']menuu["\']', 'aria-haspopup="true"', "ARIA: Valor menuu incorrecto"),
+    (r'aria-expanded=["\']falso["\']', 'aria-expanded="false"', "ARIA: Valor falso incorrecto"),
+    (r'aria-pressed=["\']talvez["\']', 'aria-pressed="false"', "ARIA Valor: talvez -> false"),
+    (r'aria-hidden=["\']talvez["\']', 'aria-hidden="true"', "ARIA: Valor talvez incorrecto"),
+    (r'aria-hidden=["\']false["\']', '', "ARIA: Default false limpieza"),
+    (r'aria-labelled-by=', 'aria-labelledby=', "ARIA: Typo labelledby"),
+    (r'aria-label=""', 'aria-label="Acción"', "A11y: aria-label vacío"),
+])
+
+# Formularios
+_FORM_RULES = _compile_rules([
+    (r'type=["\']submit["\']', 'type="button"', "Form: submit a button genérico"),
+    (r'data-menu-button=["\']true["\']', 'data-menu-button', "HTML: Boolean attribute normalización"),
+    (r'hidden=["\']hidden["\']', 'hidden', "HTML: Hidden normalización"),
+
+    (r'(<input[^>]*placeholder=["\']([^"\']+)["\'])(?![^>]*aria-label)', r'\1 aria-label="\2"', "Form: Placeholder a aria-label"),
+    (r'(<input(?![^>]*aria-label)(?![^>]*type=["\'](?:hidden|submit|button|image)["\'])[^>]*placeholder=["\']([^"\']+)["\'][^>]*)>', r'\1 aria-label="\2">', "A11y: Placeholder a label regex fallback"),
+
+    (r'(<input[^>]*type=["\']email["\'])(?![^>]*autocomplete)', r'\1 autocomplete="email"', "Form: Autocomplete Email"),
+    (r'(<input[^>]*type=["\']tel["\'])(?![^>]*autocomplete)', r'\1 autocomplete="tel"', "Form: Autocomplete Tel"),
+
+    (r'autofocus(?:=["\']autofocus["\'])?', '', "A11y: Eliminar autofocus"),
+    (r'accesskey=["\'][^"\']*["\']', '', "A11y: Eliminar accesskey"),
+    (r'tabindex=["\'][1-9]\d*["\']', 'tabindex="0"', "A11y: Tabindex positivo a 0"),
+
+    (r'<button((?![^>]*type=)[^>]*)>', r'<button type="button"\1>', "Form: Button type explícito"),
+])
+
+# Enlaces, imágenes y limpieza
+_LINK_RULES = _compile_rules([
+    (r'href="(?!http|#|mailto:)([a-zA-Z0-9-]+)"', r'href="#\1"', "Nav: Link interno fix"),
+])
+
+# Reemplazos literales de href/target: no se solapan ni se habilitan entre
+# sí, van en una sola pasada
+_LINK_ATTR_RULES = _fuse_rules([
+    (r'href="#contenido-principal\s+noexistente"', 'href="#contenido-principal"', "Nav: Skip link fix"),
+    (r'href=["\']mail:', 'href="mailto:', "Link: Protocolo mail fix"),
+    (r'href=["\']tel:\s*', 'href="tel:', "Link: Protocolo tel fix"),
+    (r'target="_blank"', 'target="_blank" rel="noopener"', "Seguridad: target blank"),
+])
+
+# Va después: borra el enlace vacío entero, con los atributos ya corregidos
+_EMPTY_LINK_RULES = _compile_rules([
+    (r'<a[^>]*href=["\'](?:#|javascript:void\(0\);?)["\'][^>]*>\s*</a>', '', "Limpieza: Link vacío"),
+])
+
+# Literales independientes (JS, basura y extensiones): una sola pasada
+_LINK_LITERAL_RULES = _fuse_rules([
+    (r'menu\.hidden\s*=\s*"false"', 'menu.hidden = false', "JS: String bool fix"),
+    (r'\?\s*closeMenu\s*:\s*openMenu', '? closeMenu() : openMenu()', "JS: Ternario call fix"),
+    (r'firstLink\.focus\(\)', 'if (firstLink) firstLink.focus()', "JS: Null check focus"),
+
+    (r'los-menues-debens-ser-accesibles="sí"', '', "Limpieza: Atributo basura"),
+    (r'alt="Texto que no se usa en enlaces"', '', "HTML: Alt en enlace borrado"),
+    (r'<a>Consultoría', '<a href="#">Consultoría', "HTML: Link roto fix"),
+
+    (r'\.jgp["\']', '.jpg"', "Typo: Extensión jgp"),
+    (r'\.pnj["\']', '.png"', "Typo: Extensión pnj"),
+])
+
+# Imágenes: van después, porque el typo .pnj puede destapar banner.png
+_IMG_RULES = _compile_rules([
+    # Equivale a r'<img src="banner.png"(?!.*alt).*?>': la ventana hace de lookahead
+    (r'<img src="banner.png".*?>', '<img src="banner.png" alt="Banner promocional genérico">', "A11y: Alt parcheado banner", _after_last(r'<img src="banner.png"', r'alt')),
+    (r'(<img(?![^>]*alt=)[^>]*)(>)', r'\1 alt=""\2', "A11y: Alt vacío preventivo fallback"),
+    (r'(<img[^>]*)\stitle=["\'][^"\']*["\']', r'\1', "A11y: Eliminar title redundante en img"),
+])
+
+_ATTRIBUTE_TYPOS = {
+    r'cllas=': 'class=', r'srcrn=': 'src=', r'hfre=': 'href=',
+    r'witdh=': 'width=', r'heigth=': 'height=', r'tab-index=': 'tabindex=',
+    r'col-span=': 'colspan=', r'row-span=': 'rowspan=', r'readonly=': 'readonly'
+}
+# Literales que no se solapan entre sí: una sola pasada para los nueve
+_TYPO_RULES = _fuse_rules([(bad, good, f"Typo: {bad}") for bad, good in _ATTRIBUTE_TYPOS.items()])
+
+_SCRIPT_CLEANUP_RULES = _compile_rules([
+    (r'\son[a-z]+=["\']return\s+false;?["\']', '', "JS: Eliminar return false inline"),
+    (r'\slanguage=["\']javascript["\']', '', "W3C: Script language obsoleto"),
+])
+
+# Revisiones manuales: (patrón, palabras clave, prioridad, categoría, mensaje)
+# Los patrones van en minúsculas: también se aplican sin IGNORECASE sobre la
+# vista lower() del documento (ver _scan_manual_checks).
+_MANUAL_CHECK_TABLE = [
+    # 1. Imágenes
+    (r'<img[^>]+>', ("<img",), "ALTA", "Semántica Visual (Imágenes)", "Se han parcheado atributos ALT. Un humano debe verificar que la descripción coincida con la imagen real."),
+    # 2. Contraste
+    (r'style=["\'][^"\']*(color|background)[^"\']*["\']', ("style=",), "ALTA", "Contraste", "Verificar ratio contraste manual 4.5:1."),
+    (r'\.muted\s*{[^}]*}', (".muted",), "ALTA", "Contraste", "Clase .muted detectada. Verificar ratio contraste manual 4.5:1."),
+    # 3. Formularios
+    (r'<(input|select|textarea)[^>]*>', ("<input", "<select", "<textarea"), "ALTA", "Formularios (Etiquetas)", "Campos de formulario detectados. Verificar que 'aria-label' o '<label>' describan con precisión la acción esperada."),
+    # 4. Navegación
+    (r'class=["\'][^"\']*skip-link[^"\']*["\']', ("skip-link",), "MEDIA", "Navegación (Skip Link)", "Se detectó enlace de salto. Verificar CSS: ¿Es visible al recibir el foco (focus)? ¿El ID destino existe?"),
+    (r'<a\s+href', ("<a",), "BAJA", "Navegación (Contexto)", "Enlaces detectados. Verificar manualmente que los destinos (href) lleven a páginas válidas y tengan sentido en contexto."),
+]
+_MANUAL_CHECKS = [(re.compile(pattern, re.I), re.compile(pattern), keys, priority, category, message)
+                  for pattern, keys, priority, category, message in _MANUAL_CHECK_TABLE]
+
 
 class AutoFixer:
     def __init__(self, html_content: str):
@@ -8,26 +393,42 @@ class AutoFixer:
         self.changes: List[Dict[str, Any]] = []
         self.manual_warnings: List[Dict[str, Any]] = []
         # Eliminamos self._existing_ids ya que se calcula localmente donde se necesita
+        # Última consulta de línea: (versión del HTML, índice, número de línea)
+        self._line_source = None
+        self._line_index = 0
+        self._line_num = 1
+        # Vista en minúsculas de la última versión del HTML consultada
+        self._lower_source = None
+        self._lower_html = ""
+        self._lower_exact = True
 
     def _get_line_number(self, index: int, content: str) -> int:
-        return content.count('\n', 0, index) + 1
+        # Dentro de una pasada las coincidencias llegan en orden: se cuenta
+        # solo el tramo desde la consulta anterior en vez de desde el inicio.
+        if content is self._line_source and index >= self._line_index:
+            self._line_num += content.count('\n', self._line_index, index)
+        else:
+            self._line_source = content
+            self._line_num = content.count('\n', 0, index) + 1
+        self._line_index = index
+        return self._line_num
+
+    def _log_change(self, rule_name: str, before: str, after: str, index: int, line_shift: int = 0):
+        line_num = self._get_line_number(index, self.current_html) + line_shift
 
-    def _log_change(self, rule_name: str, before: str, after: str, index: int):
-        line_num = self._get_line_number(index, self.current_html)
-        
         # --- LÓGICA DE PRIORIDAD AUTOMÁTICA ---
         # Definimos la prioridad basándonos en palabras clave de la regla
         priority = "[MEDIA]" # Valor por defecto
-        
+
         rule_upper = rule_name.upper()
-        
+
         # Reglas críticas que rompen accesibilidad o la página
         if any(x in rule_upper for x in ["A11Y", "SEGURIDAD", "SINTAXIS", "W3C", "CRÍTICO"]):
             priority = "[ALTA]"
         # Reglas cosméticas o de limpieza leve
         elif any(x in rule_upper for x in ["TYPO", "CLEAN", "LIMPIEZA", "LINK"]):
             priority = "[BAJA]"
-        
+
         # Combinamos: "[ALTA] Nombre de la regla"
         formatted_rule = f"{priority} {rule_name}"
 
@@ -38,8 +439,13 @@ class AutoFixer:
             "after": after.strip()[:60] + "..."
         })
 
-    def _apply_regex(self, pattern: str, replacement: str, rule_name: str, conditional_check: bool = True):
+    def _apply_regex(self, pattern: Union[str, Pattern], replacement, rule_name: str, conditional_check: bool = True, bound: Optional[_Bound] = None):
         try:
+            # Las reglas estáticas llegan ya compiladas; solo los patrones
+            # dinámicos (p.ej. IDs duplicados) se compilan aquí.
+            if isinstance(pattern, str):
+                pattern = re.compile(pattern, _FLAGS)
+
             def replacer(match):
                 before_text = match.group(0)
                 try:
@@ -49,191 +455,173 @@ class AutoFixer:
                         after_text = match.expand(replacement)
                 except Exception:
                     after_text = str(replacement)
-                
+
                 if conditional_check and before_text == after_text:
-                    return before_text
-                
+                    return None
+
                 self._log_change(rule_name, before_text, after_text, match.start())
                 return after_text
 
-            self.current_html = re.sub(pattern, replacer, self.current_html, flags=re.IGNORECASE | re.DOTALL)
+            window = (0, len(self.current_html)) if bound is None else bound(self.current_html)
+            if window is None:
+                return
+            self._rewrite(pattern, replacer, *window)
         except re.error as e:
             print(f"Error crítico en regla '{rule_name}': {e}")
 
+    def _rewrite(self, pattern: Pattern, replacer, pos: int = 0, endpos: Optional[int] = None):
+        """
+        Recorre el documento una sola vez guardando solo los tramos que cambian
+        y lo reconstruye con un único join. Si `replacer` devuelve None para
+        todas las coincidencias, current_html se conserva sin copiarlo.
+        """
+        source = self.current_html
+        parts = []
+        cursor = 0
+        for match in pattern.finditer(source, pos, len(source) if endpos is None else endpos):
+            after_text = replacer(match)
+            if after_text is None:
+                continue
+            parts.append(source[cursor:match.start()])
+            parts.append(after_text)
+            cursor = match.end()
+
+        if parts:
+            parts.append(source[cursor:])
+            self.current_html = "".join(parts)
+
+    def _lowered(self) -> str:
+        if self.current_html is not self._lower_source:
+            self._lower_source = self.current_html
+            self._lower_html = self.current_html.lower()
+            # İ, ı y ſ coinciden con i/s bajo re.IGNORECASE pero lower() no los
+            # lleva a ASCII (İ -> i + U+0307): con ellos la vista no es fiable.
+            self._lower_exact = not any(ch in self._lower_html for ch in _LOWER_UNSAFE)
+        return self._lower_html
+
+    def _contains_any(self, keys: Tuple[str, ...]) -> bool:
+        # `in` sobre str es un escaneo en C, mucho más barato que lanzar la regex
+        lowered = self._lowered()
+        if not self._lower_exact:
+            return True
+        return any(key in lowered for key in keys)
+
+    def _apply_rules(self, rules: List[Tuple[Pattern, Any, str, Optional[_Bound], str]], keys: Tuple[str, ...] = ()):
+        # Si ninguna palabra clave del grupo aparece, ninguna regla puede disparar
+        if keys and not self._contains_any(keys):
+            return
+        for pattern, replacement, rule_name, bound, hint in rules:
+            # Igual por regla: sin su literal obligatorio la regex no puede coincidir
+            if hint and not self._contains_any((hint,)):
+                continue
+            self._apply_regex(pattern, replacement, rule_name, bound=bound)
+
+    def _apply_fused(self, fused: Tuple[Pattern, Dict[str, Tuple[str, str, int]], Optional[Callable[[str], Optional[Set[int]]]]], keys: Tuple[str, ...] = ()):
+        if keys and not self._contains_any(keys):
+            return
+        pattern, table, prefilter = fused
+        # Con Hyperscan descartamos el documento sin pasar por la alternancia de `re`
+        if prefilter is not None and prefilter(self.current_html) == set():
+            return
+
+        # Saltos de línea agregados/quitados por cada regla hasta la posición
+        # actual: aplicadas en secuencia, una regla ya vería los de las
+        # reglas anteriores del grupo y sus números de línea se correrían.
+        shifts = [0] * len(table)
+
+        def replacer(match):
+            # lastgroup indica qué regla de la alternancia disparó
+            replacement, rule_name, order = table[match.lastgroup]
+            before_text = match.group(0)
+            if before_text == replacement:
+                return None
+
+            self._log_change(rule_name, before_text, replacement, match.start(), sum(shifts[:order]))
+            shifts[order] += replacement.count('\n') - before_text.count('\n')
+            return replacement
+
+        self._rewrite(pattern, replacer)
+
     def _fix_head_metadata(self):
-        if re.search(r'<html[^>]*lang=["\']es["\'][^>]*lang=["\']en["\']', self.current_html, re.I):
-            self._apply_regex(r'<html[^>]*>', '<html lang="es-ES">', "Head: Unificar conflicto lang es/en")
-        
-        self._apply_regex(r'<meta charset="UTF-8">', '', "Head: Limpieza charset duplicado")
-        self._apply_regex(r'<meta\s+charset=["\']?utf-?88?["\']?\s*/?>', '<meta charset="UTF-8">', "Head: Charset a UTF-8")
-        self._apply_regex(r'<meta\s+http-equiv=["\']Content-Type["\']\s+content=["\']text/html;\s*charset=[^"\']+["\']\s*/?>', '<meta charset="UTF-8">', "Head: Modernizar meta http-equiv")
-        
-        if "charset" not in self.current_html.lower():
-            self._apply_regex(r'(<head[^>]*>)', r'\1\n  <meta charset="UTF-8">', "Head: Inserción Charset faltante")
-
-        self._apply_regex(r'<title>\s*<title>', '<title>', "Head: Doble apertura title")
-        self._apply_regex(r'<title>\s*</title>', '<title>Documento Accesible</title>', "Head: Title vacío rellenado")
-        self._apply_regex(r'<title>([^<]+)<title>', r'<title>\1</title>', "Head: Cierre de <title> faltante")
-        self._apply_regex(r'<title>(.*?)(?:<!--.*?-->)?</title>', r'<title>\1</title>', "Head: Limpieza comentarios en title")
-        
-        if "<title>" not in self.current_html.lower():
-            self._apply_regex(r'(<head[^>]*>)', r'\1\n  <title>Documento Accesible</title>', "Head: Inserción Title faltante")
-
-        if not re.search(r'<meta\s+name=["\']viewport["\']', self.current_html, re.I):
-             self._apply_regex(r'(<head[^>]*>)', r'\1\n  <meta name="viewport" content="width=device-width, initial-scale=1.0">', "Head: Inserción Viewport")
-        
-        self._apply_regex(r'(content=["\'][^"\']*width=device-width)\s+(initial-scale)', r'\1, \2', "Head: Sintaxis Viewport (coma faltante)")
-        self._apply_regex(r'content=["\']width=device-width\s+initial-scale=1(\.0)?["\']', 'content="width=device-width, initial-scale=1.0"', "Head: Sintaxis Viewport standard")
-        self._apply_regex(r'(viewport[^>]*content=["\'][^"\']*)\b(?:user-scalable=no|maximum-scale=1\.0|maximum-scale=1)\b', r'\1user-scalable=yes', "Head: Desbloquear zoom usuario")
+        if _RE_HTML_LANG_CONFLICT.search(self.current_html):
+            self._apply_regex(_RE_HTML_TAG, '<html lang="es-ES">', "Head: Unificar conflicto lang es/en")
+
+        self._apply_rules(_HEAD_CHARSET_RULES, keys=("<meta",))
+
+        if "charset" not in self._lowered():
+            self._apply_regex(_RE_HEAD_OPEN, r'\1\n  <meta charset="UTF-8">', "Head: Inserción Charset faltante")
+
+        self._apply_rules(_HEAD_TITLE_RULES, keys=("<title>",))
+
+        if "<title>" not in self._lowered():
+            self._apply_regex(_RE_HEAD_OPEN, r'\1\n  <title>Documento Accesible</title>', "Head: Inserción Title faltante")
+
+        if not _RE_VIEWPORT_META.search(self.current_html):
+             self._apply_regex(_RE_HEAD_OPEN, r'\1\n  <meta name="viewport" content="width=device-width, initial-scale=1.0">', "Head: Inserción Viewport")
+
+        self._apply_rules(_HEAD_VIEWPORT_RULES, keys=("width=device-width", "viewport"))
 
     def _fix_structure_and_semantics(self):
         # 1. ARREGLO DE MAIN (Evitando duplicados)
-        if "<main" not in self.current_html.lower():
-            pattern = r'<div\s+([^>]*\b(role=["\']main["\']|id=["\'](?:contenido|main)["\'])[^>]*)>'
+        if "<main" not in self._lowered() and self._contains_any(("<div",)):
             def main_replacer(match):
                 attrs = match.group(1)
-                attrs = re.sub(r'role=["\']main["\']', '', attrs)
+                attrs = _RE_ROLE_MAIN.sub('', attrs)
                 return f'<main {attrs}>'
-            self._apply_regex(pattern, main_replacer, "Semántica: div a main")
-
-        self._apply_regex(r'<' + r'/div>(\s*(?:<!--[\s\S]*?-->\s*)*<footer)', r'\1', "Estructura: Eliminar div cierre huérfano antes de footer")
-        self._apply_regex(r'id="titulo-estructuraa"', 'id="titulo-estructura"', "HTML: Typo ID estructura")
-
-        # 2. CIERRE DE PÁRRAFOS (Versión Segura)
-        self._apply_regex(r'(<p[^>]*>)(.*?)(?=\s*<div)', r'\1\2</p>', "HTML Sintaxis: <p> mal cerrado antes de div")
-        self._apply_regex(r'(<p[^>]*>.*?)(?=<p)', r'\1</p>', "HTML Sintaxis: <p> anidado prohibido")
-        self._apply_regex(r'</p>Esta página', '<p>Esta página', "HTML: p invertido")
-        self._apply_regex(r'<span>([^<]+)(?!\s*</span>)', r'<span>\1</span>', "HTML: span abierto")
-        
-        # 3. LISTAS
-        self._apply_regex(r'(<ul>\s*)<ul>', r'\1<li><ul>', "Estructura: ul dentro de ul sin li")
-        self._apply_regex(r'</ul>\s*</ul>', '</ul></li></ul>', "Estructura: cierre ul anidado")
-        self._apply_regex(r'<li>(.*?)(?=\n\s*<li>|\n\s*</ul>)', r'<li>\1</li>', "HTML: li cierre automático")
+            self._apply_regex(_RE_DIV_MAIN, main_replacer, "Semántica: div a main")
+
+        # 2. CIERRE DE PÁRRAFOS Y 3. LISTAS
+        self._apply_rules(_STRUCTURE_RULES)
 
         # 4. IDS DUPLICADOS
-        all_ids = re.findall(r'id=["\']([^"\']+)["\']', self.current_html)
-        seen = set()
-        duplicates = [x for x in all_ids if x in seen or seen.add(x)]
-        
-        for dup_id in duplicates:
-            pattern = f'(id=["\']{re.escape(dup_id)}["\'].*?)id=["\']{re.escape(dup_id)}["\']'
-            replacement = f'\\1id="{dup_id}-dup"' 
-            self._apply_regex(pattern, replacement, f"HTML: ID duplicado '{dup_id}' corregido")
+        # Una sola pasada contando apariciones: la primera conserva el id, la
+        # segunda pasa a "-dup" y las siguientes a "-dup2", "-dup3"... (únicos)
+        id_counts = Counter()
+
+        def dedup_id(match):
+            value = match.group(1)
+            id_counts[value] += 1
+            seen = id_counts[value]
+            if seen == 1:
+                return None
+            suffix = "-dup" if seen == 2 else f"-dup{seen - 1}"
+            after_text = f'id="{value}{suffix}"'
+            self._log_change(f"HTML: ID duplicado '{value}' corregido", match.group(0), after_text, match.start())
+            return after_text
+
+        self._rewrite(_RE_ID_ATTR, dedup_id)
 
         # 5. SEMÁNTICA Y LIMPIEZA GENERAL
-        self._apply_regex(r'<b>(.*?)</b>', r'<strong>\1</strong>', "Semántica: b a strong")
-        self._apply_regex(r'<i>(.*?)</i>', r'<em>\1</em>', "Semántica: i a em")
-        self._apply_regex(r'<center>(.*?)</center>', r'<div style="text-align:center">\1</div>', "W3C: Deprecado center")
-        self._apply_regex(r'<font[^>]*>(.*?)</font>', r'<span>\1</span>', "W3C: Deprecado font")
-        self._apply_regex(r'<strike>(.*?)</strike>', r'<del>\1</del>', "Semántica: strike a del")
-        self._apply_regex(r'<u>(.*?)</u>', r'<span style="text-decoration: underline;">\1</span>', "A11y: u confuso")
-        self._apply_regex(r'<br\s+/>', '<br>', "HTML: XHTML br a HTML5")
-
-        self._apply_regex(r'(<table[^>]*)border=["\']\d+["\']', r'\1', "Clean: Tabla border")
-        self._apply_regex(r'(<[^>]+)align=["\'][^"\']*["\']', r'\1', "Clean: Atributo align")
-        self._apply_regex(r'(<[^>]+)bgcolor=["\'][^"\']*["\']', r'\1', "Clean: Atributo bgcolor")
-        self._apply_regex(r'<td\s+headers=["\'][^"\']*["\']', '<td', "Clean: Headers complejos en TD")
-        self._apply_regex(r'<table[^>]*\bsummary=["\'][^"\']*["\']', '<table', "W3C: Summary obsoleto")
+        self._apply_rules(_SEMANTIC_RULES)
 
         # 6. LIMPIEZA DE FANTASMAS
-        self._apply_regex(r'^\s*</p>', '', "HTML: Limpieza cierre huérfano inicio")
-        self._apply_regex(r'(<div[^>]*>)\s*</p>', r'\1', "HTML: Limpieza cierre huérfano tras div")
-        self._apply_regex(r'(<form[^>]*>)\s*</p>', r'\1', "HTML: Limpieza cierre huérfano tras form")
-        self._apply_regex(r'</p>\s*<p>', '<p>', "HTML: Fusión de párrafos rotos")
+        self._apply_rules(_GHOST_RULES, keys=("</p>",))
 
     def _fix_css_and_styles(self):
-        self._apply_regex(r'outline:\s*none;?', 'outline: 3px solid #ff9900;\n      outline-offset: 2px;', "CSS A11y: Foco visible restaurado")
-        self._apply_regex(r'display:\s*nonee', 'display: none', "CSS: Typo display")
-        self._apply_regex(r'width:\s*1000%;', 'width: 100%;', "CSS: 1000% a 100%")
-        self._apply_regex(r'background-color:\s*var\(--color-fond\)', 'background-color: var(--color-fondo)', "CSS: Typo variable fondo")
-        self._apply_regex(r'"Segoe UI"\s+sans-serif', '"Segoe UI", sans-serif', "CSS: Coma faltante font-family")
-        self._apply_regex(r'color:\s*#00000;', 'color: #000000;', "CSS: Hex incompleto")
-        self._apply_regex(r'(--color-fondo: #[0-9a-fA-F]{6})(\s+--color)', r'\1;\2', "CSS: Punto y coma faltante")
-        self._apply_regex(r'style=["\'][^"\']*display:\s*none[^"\']*["\']', 'hidden', "HTML: Style display none a atributo hidden")
+        self._apply_fused(_CSS_LITERAL_RULES)
+        self._apply_rules(_CSS_RULES)
 
     def _fix_roles_and_aria(self):
-        redundant_roles = [
-            (r'role="banner"\s+role="header"', 'role="banner"'),
-            (r'role="navigation main"', 'role="navigation"'),
-            (r'<nav[^>]*role=["\']navigation["\']', '<nav'),
-            (r'<header[^>]*role=["\']banner["\']', '<header'),
-            (r'<footer[^>]*role=["\']contentinfo["\']', '<footer'),
-            (r'<main[^>]*role=["\']main["\']', '<main'),
-            (r'<form[^>]*role=["\']form["\']', '<form'),
-        ]
-        for pat, rep in redundant_roles:
-            self._apply_regex(pat, rep, "ARIA: Roles redundantes")
-
-        self._apply_regex(r'aria-role=["\']link["\']', 'role="link"', "ARIA: aria-role no existe")
-        self._apply_regex(r'role=["\']menuu["\']', 'role="menu"', "ARIA: Typo menuu")
-        self._apply_regex(r'role=["\']menubar["\']', 'role="menu"', "ARIA: Simplificar menubar")
-        self._apply_regex(r'role=["\']menuitemcheckbox["\']', 'role="menuitem"', "ARIA: Simplificar checkbox")
-        
-        self._apply_regex(r'aria-haspopup=["\']menuu["\']', 'aria-haspopup="true"', "ARIA: Valor menuu incorrecto")
-        self._apply_regex(r'aria-expanded=["\']falso["\']', 'aria-expanded="false"', "ARIA: Valor falso incorrecto")
-        self._apply_regex(r'aria-pressed=["\']talvez["\']', 'aria-pressed="false"', "ARIA Valor: talvez -> false")
-        self._apply_regex(r'aria-hidden=["\']talvez["\']', 'aria-hidden="true"', "ARIA: Valor talvez incorrecto")
-        self._apply_regex(r'aria-hidden=["\']false["\']', '', "ARIA: Default false limpieza")
-        self._apply_regex(r'aria-labelled-by=', 'aria-labelledby=', "ARIA: Typo labelledby")
-        self._apply_regex(r'aria-label=""', 'aria-label="Acción"', "A11y: aria-label vacío")
+        self._apply_rules(_REDUNDANT_ROLE_RULES, keys=("role=",))
+        self._apply_fused(_ARIA_VALUE_RULES, keys=("role=", "aria-"))
 
     def _fix_forms_and_attributes(self):
-        self._apply_regex(r'type=["\']submit["\']', 'type="button"', "Form: submit a button genérico")
-        self._apply_regex(r'data-menu-button=["\']true["\']', 'data-menu-button', "HTML: Boolean attribute normalización")
-        self._apply_regex(r'hidden=["\']hidden["\']', 'hidden', "HTML: Hidden normalización")
-        
-        self._apply_regex(r'(<input[^>]*placeholder=["\']([^"\']+)["\'])(?![^>]*aria-label)', r'\1 aria-label="\2"', "Form: Placeholder a aria-label")
-        self._apply_regex(r'(<input(?![^>]*aria-label)(?![^>]*type=["\'](?:hidden|submit|button|image)["\'])[^>]*placeholder=["\']([^"\']+)["\'][^>]*)>', r'\1 aria-label="\2">', "A11y: Placeholder a label regex fallback")
-        
-        self._apply_regex(r'(<input[^>]*type=["\']email["\'])(?![^>]*autocomplete)', r'\1 autocomplete="email"', "Form: Autocomplete Email")
-        self._apply_regex(r'(<input[^>]*type=["\']tel["\'])(?![^>]*autocomplete)', r'\1 autocomplete="tel"', "Form: Autocomplete Tel")
-        
-        self._apply_regex(r'autofocus(?:=["\']autofocus["\'])?', '', "A11y: Eliminar autofocus")
-        self._apply_regex(r'accesskey=["\'][^"\']*["\']', '', "A11y: Eliminar accesskey")
-        self._apply_regex(r'tabindex=["\'][1-9]\d*["\']', 'tabindex="0"', "A11y: Tabindex positivo a 0")
-        
-        self._apply_regex(r'<button((?![^>]*type=)[^>]*)>', r'<button type="button"\1>', "Form: Button type explícito")
-        self._apply_regex(r'<input\s+type=["\']submit["\']', '<button type="submit"', "Form: Input Submit a Button")
+        self._apply_rules(_FORM_RULES)
 
     def _fix_links_images_cleanups(self):
-        self._apply_regex(r'href="(?!http|#|mailto:)([a-zA-Z0-9-]+)"', r'href="#\1"', "Nav: Link interno fix")
-        self._apply_regex(r'href="#contenido-principal\s+noexistente"', 'href="#contenido-principal"', "Nav: Skip link fix")
-        self._apply_regex(r'href=["\']mail:', 'href="mailto:', "Link: Protocolo mail fix")
-        self._apply_regex(r'href=["\']tel:\s*', 'href="tel:', "Link: Protocolo tel fix")
-        self._apply_regex(r'target="_blank"', 'target="_blank" rel="noopener"', "Seguridad: target blank")
-        self._apply_regex(r'<a[^>]*href=["\'](?:#|javascript:void\(0\);?)["\'][^>]*>\s*</a>', '', "Limpieza: Link vacío")
-        
-        self._apply_regex(r'menu\.hidden\s*=\s*"false"', 'menu.hidden = false', "JS: String bool fix")
-        self._apply_regex(r'\?\s*closeMenu\s*:\s*openMenu', '? closeMenu() : openMenu()', "JS: Ternario call fix")
-        self._apply_regex(r'firstLink\.focus\(\)', 'if (firstLink) firstLink.focus()', "JS: Null check focus")
-        
-        self._apply_regex(r'los-menues-debens-ser-accesibles="sí"', '', "Limpieza: Atributo basura")
-        self._apply_regex(r'alt="Texto que no se usa en enlaces"', '', "HTML: Alt en enlace borrado")
-        self._apply_regex(r'<a>Consultoría', '<a href="#">Consultoría', "HTML: Link roto fix")
-        
-        self._apply_regex(r'\.jgp["\']', '.jpg"', "Typo: Extensión jgp")
-        self._apply_regex(r'\.pnj["\']', '.png"', "Typo: Extensión pnj")
-        self._apply_regex(r'<img src="banner.png"(?!.*alt).*?>', '<img src="banner.png" alt="Banner promocional genérico">', "A11y: Alt parcheado banner")
-        self._apply_regex(r'(<img[^>]*alt="")', r'\1', "A11y: Alt vacío")
-        self._apply_regex(r'(<img(?![^>]*alt=)[^>]*)(>)', r'\1 alt=""\2', "A11y: Alt vacío preventivo fallback")
-        self._apply_regex(r'(<img[^>]*)\stitle=["\'][^"\']*["\']', r'\1', "A11y: Eliminar title redundante en img")
-
-        typos = {
-            r'cllas=': 'class=', r'srcrn=': 'src=', r'hfre=': 'href=',
-            r'witdh=': 'width=', r'heigth=': 'height=', r'tab-index=': 'tabindex=',
-            r'col-span=': 'colspan=', r'row-span=': 'rowspan=', r'readonly=': 'readonly'
-        }
-        for bad, good in typos.items():
-            self._apply_regex(bad, good, f"Typo: {bad}")
-
-        self._apply_regex(r'\son[a-z]+=["\']return\s+false;?["\']', '', "JS: Eliminar return false inline")
-        self._apply_regex(r'\slanguage=["\']javascript["\']', '', "W3C: Script language obsoleto")
+        self._apply_rules(_LINK_RULES)
+        self._apply_fused(_LINK_ATTR_RULES, keys=("href=", "target="))
+        self._apply_rules(_EMPTY_LINK_RULES)
+        self._apply_fused(_LINK_LITERAL_RULES)
+        self._apply_rules(_IMG_RULES)
+        self._apply_fused(_TYPO_RULES)
+        self._apply_rules(_SCRIPT_CLEANUP_RULES, keys=("return", "language="))
 
     def _scan_manual_checks(self):
-        self.manual_warnings = [] 
+        self.manual_warnings = []
 
-        def add_warning(pattern, priority, category, message):
-            for match in re.finditer(pattern, self.current_html, re.IGNORECASE):
+        def add_warning(pattern, priority, category, message, text=None):
+            for match in pattern.finditer(self.current_html if text is None else text):
                 # Aquí calculamos la línea exacta
                 line = self._get_line_number(match.start(), self.current_html)
                 self.manual_warnings.append({
@@ -243,24 +631,27 @@ class AutoFixer:
                     "mensaje": message
                 })
 
-        # 1. Imágenes
-        add_warning(r'<img[^>]+>', "ALTA", "Semántica Visual (Imágenes)", "Se han parcheado atributos ALT. Un humano debe verificar que la descripción coincida con la imagen real.")
-
-        # 2. Contraste
-        add_warning(r'style=["\'][^"\']*(color|background)[^"\']*["\']', "ALTA", "Contraste", "Verificar ratio contraste manual 4.5:1.")
-        add_warning(r'\.muted\s*{[^}]*}', "ALTA", "Contraste", "Clase .muted detectada. Verificar ratio contraste manual 4.5:1.")
-
-        # 3. Formularios
-        add_warning(r'<(input|select|textarea)[^>]*>', "ALTA", "Formularios (Etiquetas)", "Campos de formulario detectados. Verificar que 'aria-label' o '<label>' describan con precisión la acción esperada.")
-
-        # 4. Navegación
-        add_warning(r'class=["\'][^"\']*skip-link[^"\']*["\']', "MEDIA", "Navegación (Skip Link)", "Se detectó enlace de salto. Verificar CSS: ¿Es visible al recibir el foco (focus)? ¿El ID destino existe?")
-        add_warning(r'<a\s+href', "BAJA", "Navegación (Contexto)", "Enlaces detectados. Verificar manualmente que los destinos (href) lleven a páginas válidas y tengan sentido en contexto.")
+        # 1-4. Imágenes, contraste, formularios y navegación
+        # La vista en minúsculas ya está calculada: descarta con `in` las
+        # revisiones cuya palabra clave no aparece, sin lanzar su regex.
+        # Si lower() es exacto la vista tiene los mismos índices que el HTML:
+        # sin IGNORECASE `re` salta directo al literal inicial (style=, class=)
+        # en vez de probar cada posición, y las líneas salen iguales.
+        lowered = self._lowered()
+        use_lowered = self._lower_exact
+        for ci_pattern, lower_pattern, keys, priority, category, message in _MANUAL_CHECKS:
+            if self._contains_any(keys):
+                if use_lowered:
+                    add_warning(lower_pattern, priority, category, message, lowered)
+                else:
+                    add_warning(ci_pattern, priority, category, message)
 
         # 5. Jerarquía
-        h1_matches = list(re.finditer(r'<h1', self.current_html, re.IGNORECASE))
-        if len(h1_matches) > 1:
-            for m in h1_matches:
+        # Solo hace falta saber si existe un segundo <h1>; el caso normal
+        # (uno o ninguno) no enumera todo el documento.
+        first_h1 = _RE_H1.search(self.current_html)
+        if first_h1 and _RE_H1.search(self.current_html, first_h1.end()):
+            for m in _RE_H1.finditer(self.current_html):
                 line = self._get_line_number(m.start(), self.current_html)
                 self.manual_warnings.append({
                     "line": line,
@@ -277,4 +668,13 @@ class AutoFixer:
         self._fix_forms_and_attributes()
         self._fix_links_images_cleanups()
         self._scan_manual_checks()
-        return self.current_html, self.changes, self.manual_warnings
\ No newline at end of file
+        return self.current_html, self.changes, self.manual_warnings
+
+
+def best_effort_fix_html(html_content: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Atajo funcional usado por orchestrator.py y wcag_verify_and_fix.py.
+    Retorna (html_corregido, cambios) sin las alertas manuales.
+    """
+    fixed_html, changes, _ = AutoFixer(html_content).run()
+    return fixed_html, changes
@@ -1,16 +1,70 @@
-import os
+import functools
 from typing import Dict, Any
 from playwright.sync_api import sync_playwright
 
+@functools.lru_cache(maxsize=4)
+def _read_axe(path: str) -> str:
+    # Bytes + un solo decode: sin el decodificador incremental del modo texto.
+    # Si el archivo no existe lanza FileNotFoundError, y lru_cache no guarda
+    # excepciones: un archivo que aparece después se lee en el siguiente intento
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
 def load_axe_source(axe_path: str = "axe.min.js") -> str:
-    """Carga el script de axe-core local."""
-    if not os.path.exists(axe_path):
-        if os.path.exists("axe.min.js"):
-            with open("axe.min.js", "r", encoding="utf-8") as f:
-                return f.read()
-        return "" 
-    with open(axe_path, "r", encoding="utf-8") as f:
-        return f.read()
+    """Carga el script de axe-core local (se lee de disco una sola vez por ruta)."""
+    # Se intenta abrir directo en vez de preguntar antes con os.path.exists
+    for candidate in (axe_path, "axe.min.js"):
+        try:
+            return _read_axe(candidate)
+        except FileNotFoundError:
+            continue
+    return ""
+
+# --- Navegador compartido ---
+# Lanzar Chromium cuesta cientos de ms, así que se abre una vez y cada
+# auditoría solo crea (y cierra) su propia página. La API sync de Playwright
+# está atada al hilo que la inició: usar siempre desde el mismo hilo.
+_playwright = None
+_browser = None
+# Contexto persistente con axe como init script: el fuente (~500KB) viaja al
+# navegador una sola vez en vez de inyectarse con add_script_tag por página.
+_context = None
+_context_source = None
+
+def _get_browser():
+    global _playwright, _browser
+    if _browser is None or not _browser.is_connected():
+        if _playwright is None:
+            _playwright = sync_playwright().start()
+        # Lanzamos con argumentos para evitar bloqueos de CORS
+        _browser = _playwright.chromium.launch(headless=True, args=["--no-sandbox", "--disable-web-security"])
+    return _browser
+
+def _get_context(axe_source: str):
+    global _context, _context_source
+    browser = _get_browser()
+    if _context is None or _context.browser is not browser or _context_source != axe_source:
+        if _context is not None:
+            try:
+                _context.close()
+            except Exception:
+                pass
+        _context = browser.new_context()
+        _context.add_init_script(axe_source)
+        _context_source = axe_source
+    return _context
+
+def close_browser() -> None:
+    """Cierra el navegador compartido. Llamar al terminar todas las auditorías."""
+    global _playwright, _browser, _context, _context_source
+    _context = None
+    _context_source = None
+    if _browser is not None:
+        _browser.close()
+        _browser = None
+    if _playwright is not None:
+        _playwright.stop()
+        _playwright = None
 
 def run_axe_audit(target_url: str, axe_source: str) -> Dict[str, Any]:
     """
@@ -20,28 +74,26 @@ def run_axe_audit(target_url: str, axe_source: str) -> Dict[str, Any]:
     if not axe_source:
         return {"error": "Axe source not found"}
 
-    with sync_playwright() as p:
-        # Lanzamos con argumentos para evitar bloqueos de CORS
-        browser = p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-web-security"])
-        page = browser.new_page()
-        try:
-            # Ahora navegamos a http://localhost...
-            page.goto(target_url, wait_until="load")
-            
-            # Inyección de script
-            page.add_script_tag(content=axe_source)
-            page.wait_for_function("() => typeof axe !== 'undefined'")
-            
-            results = page.evaluate("""async () => {
-                return await axe.run(document, {
-                    runOnly: { type: "tag", values: ["wcag2a","wcag2aa","wcag21a","wcag21aa"] }
-                });
-            }""")
-            return results
-        except Exception as e:
-            return {"error": str(e)}
-        finally:
-            browser.close()
+    context = _get_context(axe_source)
+    page = context.new_page()
+    try:
+        # Ahora navegamos a http://localhost...
+        page.goto(target_url, wait_until="load")
+        
+        # axe ya viene del init script del contexto: corre antes que cualquier
+        # script de la página, así que tras goto está definido sin más esperas
+        results = page.evaluate("""async () => {
+            return await axe.run(document, {
+                runOnly: { type: "tag", values: ["wcag2a","wcag2aa","wcag21a","wcag21aa"] }
+            });
+        }""")
+        return results
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        page.close()
+        # El contexto se reutiliza: que las cookies no pasen de una auditoría a otra
+        context.clear_cookies()
 
 def summarize_axe(results: Dict[str, Any]) -> Dict[str, int]:
     if "error" in results:
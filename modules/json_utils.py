@@ -0,0 +1,13 @@
+import orjson
+
+# Mismo formato que json.dump(indent=2, ensure_ascii=False), hecho en C
+_PRETTY = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+def dumps_pretty(obj) -> bytes:
+    """JSON indentado a 2 espacios, en UTF-8."""
+    return orjson.dumps(obj, option=_PRETTY)
+
+def write_json(path: str, data) -> None:
+    """Guarda `data` como JSON legible en una sola escritura."""
+    with open(path, "wb") as f:
+        f.write(dumps_pretty(data))
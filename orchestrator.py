@@ -1,43 +1,80 @@
 import argparse
-import json
+import functools
 import os
 import threading
-import time
-from http.server import SimpleHTTPRequestHandler, HTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from modules import axe_engine, auto_fixer, auditors
+from modules.json_utils import write_json
 
 # --- Configuración del Servidor Efímero ---
 class QuietHandler(SimpleHTTPRequestHandler):
     def log_message(self, format, *args):
         pass
 
-def start_server(directory, port):
-    server = HTTPServer(('localhost', port), QuietHandler)
-    server.root_directory = directory 
-    os.chdir(directory)
+def start_server(directory, port=0):
+    # port=0: el sistema asigna uno libre (sin choques entre ejecuciones)
+    # Un hilo por conexión: Lighthouse, Pa11y y Playwright piden la página a la vez
+    # El handler sirve `directory` directamente: el cwd del proceso no se toca
+    handler = functools.partial(QuietHandler, directory=directory)
+    # El constructor ya hace bind() y listen(): acepta conexiones desde aquí
+    server = ThreadingHTTPServer(('localhost', port), handler)
+    server.root_directory = directory
     thread = threading.Thread(target=server.serve_forever)
     thread.daemon = True
     thread.start()
     return server
 
+def _tool_result(future):
+    """Resultado de un auditor; si revienta, queda como {"error": ...} como los demás fallos."""
+    try:
+        return future.result()
+    except Exception as e:
+        return {"error": str(e)}
+
 def run_full_audit(target_url, file_path_for_w3c, axe_src):
-    """Ejecuta todos los auditores y retorna un diccionario de resultados."""
+    """
+    Ejecuta todos los auditores en paralelo y retorna un diccionario de resultados.
+    Lighthouse, Pa11y y W3C son procesos/HTTP externos (I/O puro) y van a hilos;
+    Axe se queda en el hilo actual porque la API sync de Playwright está atada
+    al hilo que la inició.
+    """
     results = {}
     
-    print(f"    🔎 Ejecutando Axe-core...")
-    axe_raw = axe_engine.run_axe_audit(target_url, axe_src)
-    results["axe_core"] = axe_engine.summarize_axe(axe_raw)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        print(f"    💡 Ejecutando Lighthouse...")
+        lighthouse = pool.submit(auditors.run_lighthouse, target_url)
+
+        print(f"    ♿ Ejecutando Pa11y...")
+        pa11y = pool.submit(auditors.run_pa11y, target_url)
+
+        print(f"    🌐 Ejecutando W3C Validator...")
+        w3c = pool.submit(auditors.run_w3c_validator, file_path_for_w3c)
+
+        print(f"    🔎 Ejecutando Axe-core...")
+        try:
+            axe_raw = axe_engine.run_axe_audit(target_url, axe_src)
+        except Exception as e:
+            # Un fallo de Playwright no debe tirar los otros tres resultados
+            axe_raw = {"error": str(e)}
+        results["axe_core"] = axe_engine.summarize_axe(axe_raw)
+
+        results["lighthouse"] = _tool_result(lighthouse)
+        results["pa11y"] = _tool_result(pa11y)
+        results["w3c"] = _tool_result(w3c)
     
-    print(f"    💡 Ejecutando Lighthouse...")
-    results["lighthouse"] = auditors.run_lighthouse(target_url)
+    return results
 
-    print(f"    ♿ Ejecutando Pa11y...")
-    results["pa11y"] = auditors.run_pa11y(target_url)
+def fix_file(src_path, dst_path):
+    """Lee el HTML original, lo corrige y escribe el resultado. Retorna los cambios."""
+    with open(src_path, "r", encoding="utf-8", errors="replace") as f:
+        original_html = f.read()
 
-    print(f"    🌐 Ejecutando W3C Validator...")
-    results["w3c"] = auditors.run_w3c_validator(file_path_for_w3c)
-    
-    return results
+    fixed_html, changes = auto_fixer.best_effort_fix_html(original_html)
+
+    with open(dst_path, "w", encoding="utf-8") as f:
+        f.write(fixed_html)
+    return changes
 
 def main():
     parser = argparse.ArgumentParser(description="WCAG Auditor (Audit -> Fix -> Verify)")
@@ -51,21 +88,20 @@ def main():
     # Rutas absolutas
     abs_bad_path = os.path.abspath(args.bad)
     abs_fixed_path = os.path.abspath(args.fixed)
+    abs_out_path = os.path.abspath(args.out)
     base_dir = os.path.dirname(abs_bad_path)
     file_name_bad = os.path.basename(abs_bad_path)
     file_name_fixed = os.path.basename(abs_fixed_path)
     
-    original_cwd = os.getcwd()
-    
     # Cargar Axe source una sola vez
     axe_src = axe_engine.load_axe_source(args.axe_source)
 
-    # Iniciar servidor
-    PORT = 8085
-    print(f"🌍 Servidor activo en http://localhost:{PORT}")
+    server = None
     try:
-        start_server(base_dir, PORT)
-        time.sleep(1) # Espera técnica
+        # Iniciar servidor
+        server = start_server(base_dir)
+        PORT = server.server_address[1]
+        print(f"🌍 Servidor activo en http://localhost:{PORT}")
         
         # URL targets
         url_bad = f"http://localhost:{PORT}/{file_name_bad}"
@@ -79,28 +115,25 @@ def main():
             "phase_2_audit_fixed": {}
         }
 
-        # ---------------------------------------------------------
-        # FASE 1: Auditoría Inicial (Archivo Roto)
-        # ---------------------------------------------------------
-        print("\n📊 FASE 1: Auditando archivo original (Estado actual)...")
-        # NOTA: Si el HTML está muy roto, esperamos que esto falle o de 0 errores.
-        report_data["phase_1_audit_initial"] = run_full_audit(url_bad, abs_bad_path, axe_src)
+        # La corrección no depende de la auditoría inicial: arranca ya en otro
+        # hilo (rutas absolutas, sin depender del cwd) y su regex se solapa con
+        # la espera de los auditores externos.
+        with ThreadPoolExecutor(max_workers=1) as fixer_pool:
+            fixer = fixer_pool.submit(fix_file, abs_bad_path, abs_fixed_path)
+
+            # ---------------------------------------------------------
+            # FASE 1: Auditoría Inicial (Archivo Roto)
+            # ---------------------------------------------------------
+            print("\n📊 FASE 1: Auditando archivo original (Estado actual)...")
+            # NOTA: Si el HTML está muy roto, esperamos que esto falle o de 0 errores.
+            report_data["phase_1_audit_initial"] = run_full_audit(url_bad, abs_bad_path, axe_src)
+
+            # ---------------------------------------------------------
+            # FASE 2: Reparación (Auto-Fixer)
+            # ---------------------------------------------------------
+            print("\n🛠️ FASE 2: Aplicando correcciones...")
+            changes = fixer.result()
 
-        # ---------------------------------------------------------
-        # FASE 2: Reparación (Auto-Fixer)
-        # ---------------------------------------------------------
-        print("\n🛠️ FASE 2: Aplicando correcciones...")
-        # Volvemos al directorio original para leer/escribir archivos correctamente
-        os.chdir(original_cwd)
-        
-        with open(abs_bad_path, "r", encoding="utf-8", errors="replace") as f:
-            original_html = f.read()
-        
-        fixed_html, changes = auto_fixer.best_effort_fix_html(original_html)
-        
-        with open(abs_fixed_path, "w", encoding="utf-8") as f:
-            f.write(fixed_html)
-            
         report_data["fixes_applied"] = changes
         print(f"   ✅ Se aplicaron {len(changes)} correcciones estructurales.")
 
@@ -112,8 +145,7 @@ def main():
         report_data["phase_2_audit_fixed"] = run_full_audit(url_fixed, abs_fixed_path, axe_src)
 
         # Guardar reporte final
-        with open(args.out, "w", encoding="utf-8") as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
+        write_json(abs_out_path, report_data)
 
         print("\n🏁 PROCESO COMPLETADO EXITOSAMENTE.")
         print(f"   📄 Reporte Unificado: {args.out}")
@@ -130,7 +162,11 @@ def main():
     except Exception as e:
         print(f"\n❌ ERROR CRÍTICO: {e}")
     finally:
-        os.chdir(original_cwd)
+        axe_engine.close_browser()
+        if server is not None:
+            # Detiene el hilo de serve_forever y libera el socket
+            server.shutdown()
+            server.server_close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
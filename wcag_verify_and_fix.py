@@ -1,57 +1,134 @@
 import argparse
+import functools
+import gzip
+import hashlib
+import inspect
 import json
 import os
 import sys
+import urllib.parse
+import urllib.request
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from playwright.sync_api import sync_playwright
 
+# Playwright llama inspect.stack() en cada llamada a su API solo para
+# adjuntar la pila a sus trazas, y eso se come buena parte de la CPU.
+# Con PW_INSPECT_STACK=0 se le entrega una pila vacía. Es opcional porque
+# toca internos de Playwright: si cambian de versión, no se parchea nada.
+class _InspectSinPila:
+    def __getattr__(self, name):
+        return getattr(inspect, name)
+
+    @staticmethod
+    def stack(context=1):
+        return []
+
+if os.getenv("PW_INSPECT_STACK") == "0":
+    try:
+        from playwright._impl import _connection, _sync_base
+        for _mod in (_connection, _sync_base):
+            if hasattr(_mod, "inspect"):
+                _mod.inspect = _InspectSinPila()
+    except ImportError:
+        pass
+
 # --- CORRECCIÓN DE IMPORTACIÓN ---
 # Intentamos importar desde la carpeta 'modules' donde tienes el archivo
 try:
     from modules.auto_fixer import best_effort_fix_html
+    from modules.json_utils import write_json
 except ImportError:
     # Si falla, intentamos buscarlo en la raíz (por si acaso lo mueves)
     try:
         from auto_fixer import best_effort_fix_html
+        from json_utils import write_json
     except ImportError:
         print("Error CRITICO: No se encontro auto_fixer.py ni en la raiz ni en la carpeta 'modules'.")
         sys.exit(1)
 
-def auditar_w3c_online(ruta_archivo):
+# Respuestas del W3C guardadas por SHA-256 del HTML: re-auditar un archivo
+# sin cambios no vuelve a subirlo (ni gasta el rate limit del validador)
+_W3C_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "wcag_w3c")
+
+# Sesión para el validador: si responde 429/503 reintenta con espera
+# creciente (respetando Retry-After) en vez de fallar a la primera.
+# Validar no tiene efectos, así que reintentar el POST es seguro.
+_W3C_SESSION = requests.Session()
+_W3C_SESSION.mount("https://", HTTPAdapter(max_retries=Retry(
+    total=3,
+    backoff_factor=1.0,
+    status_forcelist=(429, 503),
+    allowed_methods=frozenset({"POST"}),
+    raise_on_status=False,
+)))
+
+def _guardar_cache_w3c(ruta_cache, resultado):
     try:
-        with open(ruta_archivo, 'rb') as f:
-            contenido = f.read()
+        os.makedirs(_W3C_CACHE_DIR, exist_ok=True)
+        # Se escribe aparte y se renombra: otra corrida nunca lee un JSON a medias
+        tmp = f"{ruta_cache}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False)
+        os.replace(tmp, ruta_cache)
+    except OSError:
+        pass  # Sin caché se sigue funcionando igual
+
+def auditar_w3c_online(contenido: bytes):
+    """Valida el HTML (bytes UTF-8) con el Nu HTML Checker del W3C."""
+    try:
+        ruta_cache = os.path.join(_W3C_CACHE_DIR, hashlib.sha256(contenido).hexdigest() + ".json")
+        try:
+            with open(ruta_cache, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
         
-        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        # El HTML sube comprimido; la respuesta ya llega en gzip porque
+        # requests manda Accept-Encoding por defecto
+        headers = {'Content-Type': 'text/html; charset=utf-8', 'Content-Encoding': 'gzip'}
         url = 'https://validator.w3.org/nu/?out=json'
         
-        respuesta = requests.post(url, data=contenido, headers=headers, timeout=20)
+        respuesta = _W3C_SESSION.post(url, data=gzip.compress(contenido, compresslevel=6), headers=headers, timeout=20)
         
         if respuesta.status_code == 200:
             resultados = respuesta.json()
             mensajes = resultados.get('messages', [])
             errores = [m for m in mensajes if m.get('type') == 'error']
-            return {
+            resultado = {
                 "executed": True,
                 "errors": len(errores),
                 "messages": errores
             }
+            _guardar_cache_w3c(ruta_cache, resultado)
+            return resultado
         else:
             return {"executed": False, "errors": f"Error HTTP {respuesta.status_code}"}
             
     except Exception as e:
         return {"executed": False, "errors": f"Excepcion W3C: {str(e)}"}
 
-def line_from_index(text: str, idx: int) -> int:
-    return text.count("\n", 0, max(idx, 0)) + 1
+def find_line_numbers(source: str, snippets) -> dict:
+    """
+    Línea de la primera aparición de cada fragmento en `source`.
+    Los que no aparecen (o vienen vacíos) no quedan en el dict.
+    """
+    found = {}
+    for snippet in snippets:
+        if snippet and snippet not in found:
+            found[snippet] = source.find(snippet)
 
-def find_line_number(source: str, snippet: str) -> int | None:
-    if not source or not snippet:
-        return None
-    pos = source.find(snippet)
-    if pos == -1:
-        return None
-    return line_from_index(source, pos)
+    # Recorriendo las posiciones en orden, cada tramo de saltos de línea se
+    # cuenta una sola vez en vez de contar desde el inicio por fragmento
+    lines = {}
+    line, last = 1, 0
+    for pos, snippet in sorted((pos, s) for s, pos in found.items() if pos != -1):
+        line += source.count("\n", last, pos)
+        last = pos
+        lines[snippet] = line
+    return lines
 
 def load_file(path: str) -> str:
     with open(path, "r", encoding="utf-8", errors="replace") as f:
@@ -61,47 +138,97 @@ def save_file(path: str, content: str) -> None:
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
 
+@functools.lru_cache(maxsize=4)
 def load_axe_source(axe_path: str) -> str:
-    # 1. Buscamos ruta exacta dada
-    if os.path.exists(axe_path):
-        return load_file(axe_path)
-    # 2. Buscamos en raiz
-    if os.path.exists("axe.min.js"):
-        return load_file("axe.min.js")
-    # 3. Buscamos en modules
-    if os.path.exists("modules/axe.min.js"):
-        return load_file("modules/axe.min.js")
-        
+    # Ruta exacta dada, luego raiz, luego modules. Se lee como bytes y se
+    # decodifica una vez (axe.min.js trae UTF-8 no ASCII, no vale 'ascii')
+    for candidate in (axe_path, "axe.min.js", "modules/axe.min.js"):
+        try:
+            with open(candidate, "rb") as f:
+                return f.read().decode("utf-8", errors="replace")
+        except FileNotFoundError:
+            continue
+
     raise FileNotFoundError(f"No encontre axe.min.js en ninguna ruta (raiz o modules).")
 
-def run_axe(page, file_path: str, axe_source: str) -> dict:
-    url = "file://" + os.path.abspath(file_path).replace("\\", "/")
-    
+# Origen ficticio: Playwright intercepta todo lo que va aquí, nunca sale a la red
+_AUDIT_ORIGIN = "http://wcag-audit.local"
+
+def serve_in_memory(page, html: str, file_path: str) -> str:
+    """
+    Sirve `html` directo desde memoria (sin archivo temporal) en la URL que
+    replica la ruta absoluta de `file_path`. Las demás rutas del origen se
+    leen del disco igual que con file://, así que ../css/x.css o /x.css
+    cargan los mismos archivos que vería el original. Retorna la URL.
+    """
+    file_path = os.path.abspath(file_path)
+
+    def handle(route):
+        path = urllib.parse.urlsplit(route.request.url).path
+        local = os.path.normpath(urllib.request.url2pathname(path))
+        if local == file_path:
+            route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+        elif os.path.isfile(local):
+            route.fulfill(path=local)
+        else:
+            route.fulfill(status=404)
+
+    page.route(_AUDIT_ORIGIN + "/**", handle)
+    # En Windows pathname2url puede anteponer '///' a la unidad (C:)
+    return _AUDIT_ORIGIN + "/" + urllib.request.pathname2url(file_path).lstrip("/")
+
+# Recursos externos que ninguna regla de axe necesita: una imagen o fuente
+# de un CDN lento retrasaba el evento load hasta el timeout de goto
+_BLOCKED_REMOTE_TYPES = frozenset({"image", "font", "media"})
+
+def block_remote_assets(page) -> None:
+    """Aborta imágenes, fuentes y media de otros orígenes (el CSS sí carga)."""
+    def handle(route):
+        request = route.request
+        if request.resource_type in _BLOCKED_REMOTE_TYPES and not request.url.startswith(_AUDIT_ORIGIN + "/"):
+            route.abort()
+        else:
+            route.continue_()
+
+    page.route("**/*", handle)
+
+def run_axe(page, url: str) -> dict:
+    # axe llega por el init script del contexto (ver main): ya está definido
+    # cuando la página termina de cargar, sin inyectarlo en cada navegación
     try:
         page.goto(url, wait_until="load", timeout=15000)
     except Exception as e:
         return {"error": str(e), "violations": []}
 
-    has_body = page.evaluate("document.body !== null")
-    if not has_body:
-        return {"error": "Documento vacio o body null", "violations": []}
-    
-    page.add_script_tag(content=axe_source)
-    
-    axe_loaded = page.evaluate("typeof axe !== 'undefined'")
-    if not axe_loaded:
-        return {
-            "violations": [{"id": "CRITICAL-ERROR", "impact": "critical", "help": "Axe no cargo. HTML roto.", "nodes": []}],
-            "passes": [],
-            "incomplete": []
-        }
-
+    # Un solo evaluate (un viaje por CDP) para las comprobaciones y axe.run.
+    # De passes/incomplete solo se usa cuántas hay, y de cada violación los
+    # campos del reporte: se recorta en el navegador para no serializar el
+    # resultado completo por el WebSocket
     return page.evaluate(
         """async () => {
+            if (document.body === null) {
+                return { error: "Documento vacio o body null", violations: [] };
+            }
+            if (typeof axe === 'undefined') {
+                return {
+                    violations: [{ id: "CRITICAL-ERROR", impact: "critical", help: "Axe no cargo. HTML roto.", nodes: [] }],
+                    passes: [],
+                    incomplete: []
+                };
+            }
             try {
-                return await axe.run(document, {
-                    runOnly: { type: "tag", values: ["wcag2a","wcag2aa","wcag21a","wcag21aa"] }
+                const r = await axe.run(document, {
+                    runOnly: { type: "tag", values: ["wcag2a","wcag2aa","wcag21a","wcag21aa"] },
+                    resultTypes: ["violations"]
                 });
+                return {
+                    violations: r.violations.map(v => ({
+                        id: v.id, impact: v.impact, help: v.help, helpUrl: v.helpUrl, tags: v.tags,
+                        nodes: v.nodes.map(n => ({ html: n.html, target: n.target, failureSummary: n.failureSummary }))
+                    })),
+                    incomplete_count: r.incomplete.length,
+                    passes_count: r.passes.length
+                };
             } catch(e) {
                 return { error: e.toString(), violations: [] };
             }
@@ -113,54 +240,71 @@ def summarize(results: dict) -> dict:
         return {"violations": 999, "incomplete": 0, "passes": 0, "error": results["error"]}
     return {
         "violations": len(results.get("violations", [])),
-        "incomplete": len(results.get("incomplete", [])),
-        "passes": len(results.get("passes", [])),
+        "incomplete": results.get("incomplete_count", len(results.get("incomplete", []))),
+        "passes": results.get("passes_count", len(results.get("passes", []))),
     }
 
+# Pistas de corrección por regla de axe (se construye una sola vez)
+_HINTS = {
+    "image-alt": "Anade alt a <img>. Decorativa: alt=\"\". Informativa: alt descriptivo.",
+    "document-title": "Asegura <title> unico y correctamente cerrado en <head>.",
+    "html-has-lang": "Asegura <html lang=\"es-ES\"> (un solo lang, correcto).",
+    "duplicate-id": "Haz IDs unicos (no repitas id=\"...\").",
+    "label": "Inputs necesitan <label for=\"id\"> o aria-label/aria-labelledby.",
+    "link-name": "Enlaces necesitan texto descriptivo y/o aria-label.",
+    "button-name": "Botones necesitan nombre accesible (texto visible o aria-label).",
+    "aria-valid-attr": "Elimina atributos ARIA invalidos.",
+    "aria-valid-attr-value": "Corrige valores ARIA: true/false, menu, etc.",
+    "region": "Usa landmarks correctos: <main>, <nav aria-label>, etc.",
+    "landmark-one-main": "Debe existir un unico <main> o role=\"main\".",
+    "color-contrast": "Ajusta contraste de texto/fondo para cumplir AA.",
+    "focus-visible": "No elimines outline; define foco visible en :focus-visible."
+}
+_DEFAULT_HINT = "Revisa la regla en helpUrl y corrige el HTML/CSS/ARIA."
+
 def suggest_fix(rule_id: str, node: dict) -> str:
     html = node.get("html", "")
     target = node.get("target", [])
-    failure = (node.get("failureSummary") or "").strip()
-
-    hints = {
-        "image-alt": "Anade alt a <img>. Decorativa: alt=\"\". Informativa: alt descriptivo.",
-        "document-title": "Asegura <title> unico y correctamente cerrado en <head>.",
-        "html-has-lang": "Asegura <html lang=\"es-ES\"> (un solo lang, correcto).",
-        "duplicate-id": "Haz IDs unicos (no repitas id=\"...\").",
-        "label": "Inputs necesitan <label for=\"id\"> o aria-label/aria-labelledby.",
-        "link-name": "Enlaces necesitan texto descriptivo y/o aria-label.",
-        "button-name": "Botones necesitan nombre accesible (texto visible o aria-label).",
-        "aria-valid-attr": "Elimina atributos ARIA invalidos.",
-        "aria-valid-attr-value": "Corrige valores ARIA: true/false, menu, etc.",
-        "region": "Usa landmarks correctos: <main>, <nav aria-label>, etc.",
-        "landmark-one-main": "Debe existir un unico <main> o role=\"main\".",
-        "color-contrast": "Ajusta contraste de texto/fondo para cumplir AA.",
-        "focus-visible": "No elimines outline; define foco visible en :focus-visible."
-    }
 
-    base = hints.get(rule_id, "Revisa la regla en helpUrl y corrige el HTML/CSS/ARIA.")
+    base = _HINTS.get(rule_id, _DEFAULT_HINT)
     where = f"Target: {target}" if target else ""
     return f"{base}\n{where}\nHTML: {html}".strip()
 
 def build_issue_list(results: dict, source_html: str = None) -> list:
     out = []
+    # axe repite el mismo fragmento en muchos nodos (p.ej. color-contrast en
+    # enlaces iguales) y find() devuelve siempre la primera aparición: se
+    # busca una vez por fragmento distinto
+    line_cache = {}
+    if source_html and "violations" in results:
+        line_cache = find_line_numbers(
+            source_html,
+            (node.get("html") for v in results["violations"] for node in v.get("nodes", [])),
+        )
     if "violations" in results:
         for v in results["violations"]:
+            # Datos comunes a todos los nodos de la violacion: se calculan una vez
+            rule_id = v.get("id")
+            impact = v.get("impact")
+            help_text = v.get("help")
+            help_url = v.get("helpUrl")
+            wcag_tags = [t for t in v.get("tags", []) if "wcag" in t.lower()]
+
             for node in v.get("nodes", []):
                 snippet = node.get("html") or ""
-                line = find_line_number(source_html, snippet) if source_html else None
+                line = line_cache.get(snippet)
 
                 out.append({
-                    "rule_id": v.get("id"),
-                    "impact": v.get("impact"),
-                    "help": v.get("help"),
-                    "helpUrl": v.get("helpUrl"),
-                    "wcag_tags": [t for t in v.get("tags", []) if "wcag" in t.lower()],
+                    "rule_id": rule_id,
+                    "impact": impact,
+                    "help": help_text,
+                    "helpUrl": help_url,
+                    "wcag_tags": wcag_tags,
                     "target": node.get("target"),
                     "failureSummary": node.get("failureSummary"),
                     "html": snippet,
                     "line": line,
-                    "suggested_fix": suggest_fix(v.get("id"), node),
+                    "suggested_fix": suggest_fix(rule_id, node),
                 })
     return out
 
@@ -182,23 +326,32 @@ def main():
     raw_html = load_file(args.bad)
     # Llamamos al fixer importado (ya sea de modules o raiz)
     pre_fixed_html, initial_changes = best_effort_fix_html(raw_html)
-    
-    temp_sanitized = args.bad + ".temp_sanitized.html"
-    save_file(temp_sanitized, pre_fixed_html)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+    # W3C valida el mismo HTML corregido que audita Axe (sin releer el
+    # archivo) y no depende de Axe: la subida corre en otro hilo mientras
+    # Chromium audita
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        w3c_future = pool.submit(auditar_w3c_online, pre_fixed_html.encode("utf-8"))
+        # El HTML corregido ya es definitivo: se guarda durante la auditoría
+        save_future = pool.submit(save_file, args.fixed, pre_fixed_html)
 
-        res_bad = run_axe(page, temp_sanitized, axe_source)
-        sum_bad = summarize(res_bad)
-        
-        browser.close()
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            context = browser.new_context()
+            context.add_init_script(script=axe_source)
+            page = context.new_page()
 
-    if os.path.exists(temp_sanitized):
-        os.remove(temp_sanitized)
+            # Antes que serve_in_memory: Playwright prueba primero la última
+            # ruta registrada, así el origen de auditoría nunca pasa por aquí
+            block_remote_assets(page)
+            url = serve_in_memory(page, pre_fixed_html, args.bad)
+            res_bad = run_axe(page, url)
+            sum_bad = summarize(res_bad)
+            
+            browser.close()
 
-    w3c_res = auditar_w3c_online(args.bad)
+        w3c_res = w3c_future.result()
+        save_future.result()
 
     report = {
         "estado": "AUDIT_COMPLETE",
@@ -218,10 +371,7 @@ def main():
         ]
     }
 
-    save_file(args.fixed, pre_fixed_html)
-    
-    with open(args.out, "w", encoding="utf-8") as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
+    write_json(args.out, report)
 
     print(f"OK -> JSON: {args.out}")
     print(f"OK -> FIXED: {args.fixed}")